@@ -0,0 +1,90 @@
+"""
+Compare compile throughput of the in-process `compile_source` API, with and
+without partial evaluation, against spawning `main.py` for every request.
+Results are reported per sample, and then for a mixed workload served from
+thread pools of different sizes.
+
+    python benchmarks/throughput.py [requests]
+"""
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ttc_py import Options, compile_source
+
+SAMPLES = sorted((ROOT / "samples").glob("*.teeny"))
+NO_EVALUATION = Options(partial_evaluation=False)
+
+
+def spawn(path):
+    with tempfile.TemporaryDirectory() as workdir:
+        subprocess.run(
+            [sys.executable, str(ROOT / "main.py"), str(path)],
+            cwd=workdir,
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+
+
+def requests_per_second(requests, compile_one, workers=1):
+    start = time.perf_counter()
+    if workers == 1:
+        for i in range(requests):
+            compile_one(i)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(compile_one, range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    spawned_requests = max(1, requests // 20)
+    sources = [path.read_text() for path in SAMPLES]
+
+    print(
+        "{:<12} {:>14} {:>14} {:>14}".format(
+            "sample", "evaluated", "not evaluated", "spawn main.py"
+        )
+    )
+    for path, source in zip(SAMPLES, sources):
+        evaluated = requests_per_second(requests, lambda i: compile_source(source))
+        plain = requests_per_second(
+            requests, lambda i: compile_source(source, options=NO_EVALUATION)
+        )
+        spawned = requests_per_second(spawned_requests, lambda i: spawn(path))
+        print(
+            "{:<12} {:>10.0f} r/s {:>10.0f} r/s {:>10.0f} r/s".format(
+                path.stem, evaluated, plain, spawned
+            )
+        )
+
+    print()
+    for workers in (1, 8):
+        evaluated = requests_per_second(
+            requests, lambda i: compile_source(sources[i % len(sources)]), workers
+        )
+        plain = requests_per_second(
+            requests,
+            lambda i: compile_source(sources[i % len(sources)], options=NO_EVALUATION),
+            workers,
+        )
+        spawned = requests_per_second(
+            spawned_requests, lambda i: spawn(SAMPLES[i % len(SAMPLES)]), workers
+        )
+        print(
+            "all samples, {} worker(s): evaluated {:.0f} r/s, not evaluated "
+            "{:.0f} r/s, spawn main.py {:.0f} r/s".format(
+                workers, evaluated, plain, spawned
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,7 @@
 import sys
 from pathlib import Path
 
-from ttc_py.lexer import *
-from ttc_py.parser import *
-from ttc_py.emitter import *
+from ttc_py.compiler import *
 
 
 def usage():
@@ -19,11 +17,14 @@ def main():
     if len(sys.argv) != 2:
         usage()
 
-    emitter = Emitter("out.c")
-    parser = Parser(Lexer(read_source_file(sys.argv[1])), emitter)
-    parser.parse()
+    try:
+        result = compile_source(read_source_file(sys.argv[1]))
+    except CompileError as e:
+        sys.exit(str(e))
     print("Program parsed successfully")
-    emitter.write_file()
+    if result.evaluated:
+        print("Program partially evaluated")
+    Path("out.c").write_text(result.code)
     print("Compilation complete")
 
 
@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from ttc_py import *
+
+SAMPLES = sorted(Path("samples").glob("*.teeny"))
+
+
+def test_compile_hello():
+    result = compile_source(Path("samples/hello.teeny").read_text())
+
+    assert result.target == "c"
+    assert result.finished
+    assert '"Hello, world!\\n"' in result.code
+
+
+def test_compile_without_partial_evaluation():
+    result = compile_source(
+        Path("samples/hello.teeny").read_text(),
+        options=Options(partial_evaluation=False),
+    )
+
+    assert not result.evaluated
+    assert 'printf("%s\\n", "Hello, world!");' in result.code
+
+
+def test_compile_non_terminating_program_is_bounded():
+    source = "LET x = 0\nLABEL top\nLET x = {}\nGOTO top\n".format(
+        " + ".join(["1"] * 200)
+    )
+    result = compile_source(source)
+
+    assert not result.evaluated
+    assert result.code == compile_source(
+        source, options=Options(partial_evaluation=False)
+    ).code
+
+
+def test_compile_unsupported_target():
+    with pytest.raises(ValueError):
+        compile_source("", target="wasm")
+
+
+def test_lexer_error_position():
+    with pytest.raises(LexerError) as e:
+        compile_source('PRINT "ok"\nLET a = 1 ! 2\n')
+
+    assert (e.value.line, e.value.column) == (2, 11)
+
+
+def test_parser_error_position():
+    with pytest.raises(ParserError) as e:
+        compile_source("LET a = 1\n  PRINT b\n")
+
+    assert (e.value.line, e.value.column) == (2, 9)
+    assert str(e.value) == "Parser error at line 2, column 9: " + e.value.message
+
+
+def test_undeclared_label_position():
+    with pytest.raises(ParserError) as e:
+        compile_source("PRINT 1\nGOTO nowhere\n")
+
+    assert (e.value.line, e.value.column) == (2, 6)
+
+
+def test_compile_concurrently():
+    sources = [path.read_text() for path in SAMPLES] * 8
+    expected = [compile_source(source) for source in sources]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(compile_source, sources)) == expected
@@ -0,0 +1,196 @@
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from ttc_py.lexer import *
+from ttc_py.parser import *
+from ttc_py.evaluator import *
+
+
+def read_source_file(infile):
+    return Path(infile).read_text()
+
+
+def evaluate(source, budget=DEFAULT_BUDGET):
+    evaluator = Evaluator(Lexer(source), budget)
+    return evaluator.evaluate(), evaluator
+
+
+def compile_c(source, evaluator=None):
+    emitter = Emitter()
+    if evaluator is not None and evaluator.finished:
+        evaluator.emit_program(emitter)
+    else:
+        Parser(Lexer(source), emitter, evaluator).parse()
+    return emitter.contents()
+
+
+def run_c(code, tmp_path, stdin=""):
+    """Build the generated C the way the Makefile does, and run it"""
+    (tmp_path / "out.c").write_text(code)
+    exe = tmp_path / "ttc"
+    subprocess.run(
+        ["gcc", "-std=c99", "-o", str(exe), str(tmp_path / "out.c")], check=True
+    )
+    return subprocess.run(
+        [str(exe)], input=stdin, capture_output=True, text=True, check=True
+    ).stdout
+
+
+needs_gcc = pytest.mark.skipif(shutil.which("gcc") is None, reason="gcc not found")
+
+
+def test_evaluate_hello():
+    ok, evaluator = evaluate(read_source_file("samples/hello.teeny"))
+
+    assert ok
+    assert evaluator.finished
+    assert evaluator.output == ["Hello, world!\n", "Second line\n", "Third line\n"]
+
+
+def test_evaluate_expression():
+    ok, evaluator = evaluate(read_source_file("samples/expression.teeny"))
+
+    assert ok
+    assert evaluator.finished
+    assert evaluator.output == ["yes!\n"]
+
+
+def test_evaluate_statements_exceeds_budget():
+    assert not evaluate(read_source_file("samples/statements.teeny"))[0]
+
+
+def test_evaluate_budget():
+    source = "LET i = 0\nWHILE i < 10 REPEAT\nLET i = i + 1\nENDWHILE\n"
+
+    assert evaluate(source)[0]
+    assert not evaluate(source, budget=10)[0]
+
+
+def test_evaluate_long_expression_loop_falls_back():
+    source = "LET x = 0\nLABEL top\nLET x = {}\nGOTO top\n".format(
+        " + ".join(["1"] * 200)
+    )
+    ok, evaluator = evaluate(source)
+
+    assert not ok
+    assert evaluator.operations <= DEFAULT_BUDGET + 400
+
+
+def test_evaluate_output_limit():
+    source = 'LABEL top\nPRINT "spam"\nGOTO top\n'
+    ok, evaluator = evaluate(source, budget=10 ** 9)
+
+    assert not ok
+    assert sum(len(line) for line in evaluator.output) <= MAX_OUTPUT
+
+
+def test_evaluate_c_arithmetic():
+    source = "\n".join(
+        [
+            "PRINT 7 / 2",
+            "PRINT -7 / 2",
+            "PRINT 16777217",
+            "PRINT 2.0 / 3",
+            "IF 5 > 3 > 1 THEN",
+            'PRINT "no"',
+            "ENDIF",
+            "IF 1 < 2 == 3 < 4 THEN",
+            'PRINT "yes"',
+            "ENDIF",
+        ]
+    )
+    ok, evaluator = evaluate(source)
+
+    assert ok
+    assert evaluator.output == ["3.00\n", "-3.00\n", "16777216.00\n", "0.67\n", "yes\n"]
+
+
+def test_evaluate_division_by_zero():
+    assert not evaluate("PRINT 1 / 0")[0]
+
+
+def test_evaluate_long_literals():
+    assert not evaluate("PRINT " + "1" * 5000)[0]
+    assert not evaluate("PRINT " + "1" * 5000 + ".5")[0]
+    assert not evaluate("PRINT 2147483648")[0]
+    assert evaluate("PRINT 2147483647")[0]
+
+
+def test_evaluate_octal_literal_falls_back():
+    assert not evaluate("PRINT 010")[0]
+    assert evaluate("PRINT 0 + 010.5")[0]
+
+
+def test_evaluate_stops_at_input():
+    ok, evaluator = evaluate(read_source_file("samples/average.teeny"))
+
+    assert ok
+    assert not evaluator.finished
+    assert evaluator.resume_statement == 3
+    assert evaluator.output == ["Enter number of scores: \n"]
+    assert evaluator.variables == {"a": 0.0}
+
+
+def test_emit_program():
+    ok, evaluator = evaluate(read_source_file("samples/hello.teeny"))
+    emitter = Emitter("dummy.c")
+    evaluator.emit_program(emitter)
+
+    assert ok
+
+    assert "{}();".format(OUTPUT_FUNCTION) in emitter.code
+    assert "fwrite(output" in emitter.contents()
+    assert "printf" not in emitter.contents()
+
+
+def test_emit_specialized():
+    source = read_source_file("samples/average.teeny")
+    ok, evaluator = evaluate(source)
+    code = compile_c(source, evaluator)
+
+    assert ok
+    assert "a = 0.0f;\ngoto {};\nwhile (a<1) {{".format(RESUME_LABEL) in code
+    assert "{}:\nif(0 == scanf".format(RESUME_LABEL) in code
+    assert "a = 0;\nwhile" not in code
+
+
+def test_emit_specialized_constants():
+    source = "LET k = -2\nLET t = 0\nINPUT x\nLET t = t + x * k\nPRINT t\n"
+    ok, evaluator = evaluate(source)
+    code = compile_c(source, evaluator)
+
+    assert ok
+    assert evaluator.constants == {"k": -2.0}
+    assert "float k;" not in code
+    assert "t = 0.0f;" in code
+    assert "t = t+x*(-2.0f);" in code
+    assert "k = " not in code
+
+
+@needs_gcc
+@pytest.mark.parametrize(
+    "sample", ["average", "factorial", "fib", "minmax", "vector", "expression"]
+)
+def test_specialized_program_output(sample, tmp_path):
+    source = read_source_file("samples/{}.teeny".format(sample))
+    ok, evaluator = evaluate(source)
+    stdin = " ".join(str(n) for n in range(3, 25))
+
+    assert ok
+    assert run_c(compile_c(source, evaluator), tmp_path, stdin) == run_c(
+        compile_c(source), tmp_path, stdin
+    )
+
+
+@needs_gcc
+def test_specialized_names_cannot_be_shadowed(tmp_path):
+    source = 'LET stdout = 1\nLET fwrite = 2\nPRINT "hi"\nINPUT x\nPRINT stdout\n'
+    ok, evaluator = evaluate(source)
+
+    assert ok
+    assert run_c(compile_c(source, evaluator), tmp_path, "3") == run_c(
+        compile_c(source), tmp_path, "3"
+    )
@@ -156,3 +156,18 @@ def test_lex_vector():
     while token.kind != TokenType.EOF:
         print(token)
         token = lexer.get_token()
+
+
+def test_replay():
+    lexer = Lexer("LET foo = 1\n")
+    tokens = []
+    token = lexer.get_token()
+    while token.kind != TokenType.EOF:
+        tokens.append(token)
+        token = lexer.get_token()
+
+    stream = lexer.replay()
+    for expected in tokens:
+        assert stream.get_token() == expected
+    assert stream.get_token() == Token("\0", TokenType.EOF)
+    assert stream.get_token() == Token("\0", TokenType.EOF)
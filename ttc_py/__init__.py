@@ -1 +1,4 @@
 __version__ = '0.1.0'
+
+from ttc_py.errors import CompileError, LexerError, ParserError
+from ttc_py.compiler import Options, Result, compile_source
@@ -0,0 +1,67 @@
+from dataclasses import dataclass
+from ttc_py.errors import *
+from ttc_py.lexer import *
+from ttc_py.parser import *
+from ttc_py.emitter import *
+from ttc_py.evaluator import *
+
+TARGETS = ("c",)
+
+
+@dataclass(frozen=True)
+class Options:
+    """
+    Compiler options. Compile-time evaluation gives up after `budget`
+    operations or `max_output` characters of output, which bounds its cost
+    for programs that never finish or never read input
+    """
+
+    partial_evaluation: bool = True
+    budget: int = DEFAULT_BUDGET
+    max_output: int = MAX_OUTPUT
+
+
+@dataclass(frozen=True)
+class Result:
+    """
+    The generated program. `evaluated` is true if partial evaluation
+    replaced normal compilation, and `finished` if it ran the whole program
+    """
+
+    code: str
+    target: str
+    evaluated: bool
+    finished: bool
+
+
+def compile_source(text, *, target="c", options=None):
+    """
+    Compile Teeny Tiny source text, returning the generated code in memory.
+    Raises a `CompileError` subclass for invalid programs.
+
+    Every call builds its own lexer, parser and emitter, so this is safe to
+    call concurrently from multiple threads.
+    """
+    if target not in TARGETS:
+        raise ValueError("Unsupported target {}".format(target))
+    if options is None:
+        options = Options()
+
+    lexer = Lexer(text)
+
+    if options.partial_evaluation:
+        # the source is lexed once, by a parse that only checks it
+        Parser(lexer, NullEmitter()).parse()
+        evaluator = Evaluator(lexer.replay(), options.budget, options.max_output)
+        if evaluator.evaluate():
+            emitter = Emitter()
+            if evaluator.finished:
+                evaluator.emit_program(emitter)
+            else:
+                Parser(lexer.replay(), emitter, evaluator).parse()
+            return Result(emitter.contents(), target, True, evaluator.finished)
+        lexer = lexer.replay()
+
+    emitter = Emitter()
+    Parser(lexer, emitter).parse()
+    return Result(emitter.contents(), target, False, False)
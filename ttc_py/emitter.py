@@ -6,7 +6,7 @@ from ttc_py.parser import *
 class Emitter:
     """Translate the source program into equivalent valid C code"""
 
-    def __init__(self, outfile):
+    def __init__(self, outfile=None):
         self.outfile = outfile
         self.header = ""
         self.code = ""
@@ -20,5 +20,21 @@ class Emitter:
     def header_line(self, code):
         self.header += code + "\n"
 
+    def contents(self):
+        return self.header + self.code
+
     def write_file(self):
-        Path(self.outfile).write_text(self.header + self.code)
\ No newline at end of file
+        Path(self.outfile).write_text(self.contents())
+
+
+class NullEmitter(Emitter):
+    """Discards all code, for passes that only check the source program"""
+
+    def emit(self, code):
+        pass
+
+    def emit_line(self, code):
+        pass
+
+    def header_line(self, code):
+        pass
@@ -0,0 +1,23 @@
+class CompileError(Exception):
+    """An error in the source program, at a 1-based line and column"""
+
+    kind = "Compile"
+
+    def __init__(self, message, line, column):
+        super().__init__(message, line, column)
+        self.message = message
+        self.line = line
+        self.column = column
+
+    def __str__(self):
+        return "{} error at line {}, column {}: {}".format(
+            self.kind, self.line, self.column, self.message
+        )
+
+
+class LexerError(CompileError):
+    kind = "Lexer"
+
+
+class ParserError(CompileError):
+    kind = "Parser"
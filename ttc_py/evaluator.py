@@ -0,0 +1,390 @@
+import math
+import struct
+from ttc_py.lexer import *
+
+# C value types, ordered by the usual arithmetic conversions
+INT = 0
+FLOAT = 1
+DOUBLE = 2
+
+INT_MIN = -(2 ** 31)
+INT_MAX = 2 ** 31 - 1
+
+DEFAULT_BUDGET = 2000
+MAX_OUTPUT = 4096
+RESUME_LABEL = "ttc_resume"
+# Teeny identifiers are alphanumeric, so these can never clash with a variable
+OUTPUT_FUNCTION = "ttc_write_output"
+
+
+class EvaluationError(Exception):
+    """Raised when the program cannot be evaluated with the exact semantics of the generated C"""
+
+
+def to_float(value):
+    """Round a Python float to the nearest C float"""
+    try:
+        return struct.unpack("f", struct.pack("f", value))[0]
+    except OverflowError:
+        raise EvaluationError("float overflow")
+
+
+def c_float(value):
+    """Format a C float as a literal that is safe to splice into an expression"""
+    literal = "{!r}f".format(value)
+    return "({})".format(literal) if literal.startswith("-") else literal
+
+
+def c_string(text):
+    """Quote text as a C string literal"""
+    return '"{}"'.format(text.replace("\n", "\\n"))
+
+
+class Evaluator:
+    """
+    Run the source program at compile time, until it finishes or reaches its
+    first INPUT. Every executed statement costs one operation plus one per
+    token of its expressions, and the run gives up once it has spent
+    `budget` operations or produced more than `max_output` characters.
+
+    The program must already have been accepted by the parser.
+    """
+
+    def __init__(self, lexer, budget=DEFAULT_BUDGET, max_output=MAX_OUTPUT):
+        self.tokens = []
+        self.budget = budget
+        self.max_output = max_output
+        self.operations = 0
+        self.output_size = 0
+        self.instructions = []
+        self.statement_numbers = []
+        self.labels = {}
+        self.output = []
+        self.variables = {}
+        self.finished = False
+        self.resume_statement = None
+        self.dead_statements = set()
+        self.constants = {}
+
+        token = lexer.get_token()
+        while token.kind != TokenType.EOF:
+            self.tokens.append(token)
+            token = lexer.get_token()
+        self.build()
+
+    def build(self):
+        """Flatten the token stream into instructions with resolved jump targets"""
+        blocks = []
+        pos = 0
+        statement = 0
+
+        while pos < len(self.tokens):
+            kind = self.tokens[pos].kind
+            if kind == TokenType.NEWLINE:
+                pos += 1
+                continue
+
+            end = pos
+            while self.tokens[end].kind != TokenType.NEWLINE:
+                end += 1
+            args = self.tokens[pos + 1 : end]
+
+            if kind == TokenType.ENDIF or kind == TokenType.ENDWHILE:
+                start = blocks.pop()
+                self.instructions[start][2] = len(self.instructions) + 1
+                self.instructions.append([kind, start])
+                self.statement_numbers.append(None)
+            else:
+                if kind == TokenType.IF or kind == TokenType.WHILE:
+                    blocks.append(len(self.instructions))
+                    args = args[:-1]  # drop THEN/REPEAT
+                    self.instructions.append([kind, args, None])
+                elif kind == TokenType.LET:
+                    self.instructions.append([kind, args[0].spelling, args[2:]])
+                elif kind == TokenType.PRINT and args[0].kind == TokenType.STRING:
+                    self.instructions.append([kind, args[0].spelling])
+                elif kind == TokenType.PRINT:
+                    self.instructions.append([kind, args])
+                else:
+                    if kind == TokenType.LABEL:
+                        self.labels[args[0].spelling] = len(self.instructions)
+                    self.instructions.append([kind, args[0].spelling])
+                self.statement_numbers.append(statement)
+                statement += 1
+
+            pos = end
+
+    # expression evaluation, following the C types of the generated code
+
+    def check(self, kind, value):
+        if kind == INT and not INT_MIN <= value <= INT_MAX:
+            raise EvaluationError("int overflow")
+        if kind != INT and not math.isfinite(value):
+            raise EvaluationError("non-finite result")
+        if kind == FLOAT:
+            value = to_float(value)
+        return kind, value
+
+    def convert(self, operand, kind):
+        """Apply the usual arithmetic conversion of operand to kind"""
+        if operand[0] == kind or kind == DOUBLE:
+            return float(operand[1]) if kind != INT else operand[1]
+        return to_float(operand[1])
+
+    def arithmetic(self, op, left, right):
+        kind = max(left[0], right[0])
+        a = self.convert(left, kind)
+        b = self.convert(right, kind)
+
+        if op == TokenType.PLUS:
+            return self.check(kind, a + b)
+        elif op == TokenType.MINUS:
+            return self.check(kind, a - b)
+        elif op == TokenType.ASTERISK:
+            return self.check(kind, a * b)
+        elif b == 0:
+            raise EvaluationError("division by zero")
+        elif kind == INT:
+            quotient = abs(a) // abs(b)
+            return self.check(kind, quotient if (a < 0) == (b < 0) else -quotient)
+        else:
+            return self.check(kind, a / b)
+
+    def compare(self, op, left, right):
+        kind = max(left[0], right[0])
+        a = self.convert(left, kind)
+        b = self.convert(right, kind)
+
+        if op == TokenType.EQEQ:
+            result = a == b
+        elif op == TokenType.NOTEQ:
+            result = a != b
+        elif op == TokenType.LT:
+            result = a < b
+        elif op == TokenType.LTEQ:
+            result = a <= b
+        elif op == TokenType.GT:
+            result = a > b
+        else:
+            result = a >= b
+        return INT, int(result)
+
+    def evaluate_tokens(self, tokens):
+        """Evaluate an expression or comparison, returning a (C type, value) pair"""
+        self.charge(len(tokens))
+        self.expr = tokens
+        self.pos = 0
+        return self.equality()
+
+    def peek_kind(self):
+        if self.pos < len(self.expr):
+            return self.expr[self.pos].kind
+        return None
+
+    def equality(self):
+        """C gives == and != a lower precedence than the relational operators"""
+        left = self.relational()
+        while self.peek_kind() in (TokenType.EQEQ, TokenType.NOTEQ):
+            op = self.expr[self.pos].kind
+            self.pos += 1
+            left = self.compare(op, left, self.relational())
+        return left
+
+    def relational(self):
+        left = self.expression()
+        while self.peek_kind() in (
+            TokenType.LT,
+            TokenType.LTEQ,
+            TokenType.GT,
+            TokenType.GTEQ,
+        ):
+            op = self.expr[self.pos].kind
+            self.pos += 1
+            left = self.compare(op, left, self.expression())
+        return left
+
+    def expression(self):
+        left = self.term()
+        while self.peek_kind() in (TokenType.PLUS, TokenType.MINUS):
+            op = self.expr[self.pos].kind
+            self.pos += 1
+            left = self.arithmetic(op, left, self.term())
+        return left
+
+    def term(self):
+        left = self.unary()
+        while self.peek_kind() in (TokenType.ASTERISK, TokenType.SLASH):
+            op = self.expr[self.pos].kind
+            self.pos += 1
+            left = self.arithmetic(op, left, self.unary())
+        return left
+
+    def unary(self):
+        if self.peek_kind() == TokenType.MINUS:
+            self.pos += 1
+            kind, value = self.primary()
+            return self.check(kind, -value)
+        elif self.peek_kind() == TokenType.PLUS:
+            self.pos += 1
+        return self.primary()
+
+    def primary(self):
+        token = self.expr[self.pos]
+        self.pos += 1
+
+        if token.kind == TokenType.IDENT:
+            if token.spelling not in self.variables:
+                raise EvaluationError("read of uninitialized variable")
+            return FLOAT, self.variables[token.spelling]
+        elif "." in token.spelling:
+            return self.check(DOUBLE, float(token.spelling))
+        elif len(token.spelling) > 1 and token.spelling.startswith("0"):
+            raise EvaluationError("octal literal")
+        elif len(token.spelling) > len(str(INT_MAX)):
+            # also keeps huge literals away from int()'s digit limit
+            raise EvaluationError("int overflow")
+        else:
+            return self.check(INT, int(token.spelling))
+
+    # execution
+
+    def charge(self, operations):
+        self.operations += operations
+        if self.operations > self.budget:
+            raise EvaluationError("operation budget exceeded")
+
+    def write(self, text):
+        self.output_size += len(text)
+        if self.output_size > self.max_output:
+            raise EvaluationError("output limit exceeded")
+        self.output.append(text)
+
+    def run(self):
+        pc = 0
+
+        while pc < len(self.instructions):
+            self.charge(1)
+            instruction = self.instructions[pc]
+            kind = instruction[0]
+            pc += 1
+
+            if kind == TokenType.PRINT:
+                if isinstance(instruction[1], str):
+                    self.write(instruction[1] + "\n")
+                else:
+                    value = self.convert(self.evaluate_tokens(instruction[1]), FLOAT)
+                    self.write("{:.2f}\n".format(value))
+            elif kind == TokenType.IF or kind == TokenType.WHILE:
+                if not self.evaluate_tokens(instruction[1])[1]:
+                    pc = instruction[2]
+            elif kind == TokenType.ENDWHILE:
+                pc = instruction[1]
+            elif kind == TokenType.GOTO:
+                pc = self.labels[instruction[1]]
+            elif kind == TokenType.LET:
+                value = self.evaluate_tokens(instruction[2])
+                self.variables[instruction[1]] = self.convert(value, FLOAT)
+            elif kind == TokenType.INPUT:
+                if self.operations == 1:
+                    raise EvaluationError("nothing to evaluate before INPUT")
+                self.resume_statement = self.statement_numbers[pc - 1]
+                self.specialize(pc - 1)
+                return
+
+        self.finished = True
+
+    def reachable(self, start):
+        """The instructions that can execute after `start`"""
+        seen = set()
+        pending = [start]
+
+        while pending:
+            pc = pending.pop()
+            if pc in seen or pc >= len(self.instructions):
+                continue
+            seen.add(pc)
+
+            instruction = self.instructions[pc]
+            kind = instruction[0]
+            if kind == TokenType.GOTO:
+                pending.append(self.labels[instruction[1]])
+            elif kind == TokenType.ENDWHILE:
+                pending.append(instruction[1])
+            elif kind == TokenType.IF or kind == TokenType.WHILE:
+                pending.extend([pc + 1, instruction[2]])
+            else:
+                pending.append(pc + 1)
+        return seen
+
+    def specialize(self, resume):
+        """
+        Find the statements that can no longer run once the program resumes
+        at `resume`, and the known variables that nothing left reassigns
+        """
+        live = self.reachable(resume)
+
+        assigned = set()
+        for pc in live:
+            if self.instructions[pc][0] in (TokenType.LET, TokenType.INPUT):
+                assigned.add(self.instructions[pc][1])
+        for name, value in self.variables.items():
+            if name not in assigned:
+                self.constants[name] = value
+
+        for pc, statement in enumerate(self.statement_numbers):
+            if statement is None:
+                continue
+            end = pc + 1
+            if self.instructions[pc][0] in (TokenType.IF, TokenType.WHILE):
+                end = self.instructions[pc][2]
+            if not any(p in live for p in range(pc, end)):
+                self.dead_statements.add(statement)
+
+    # public API
+
+    def evaluate(self):
+        """
+        Run the program. Returns true if the result can replace normal
+        compilation, either fully (`finished`) or up to `resume_statement`
+        """
+        try:
+            self.run()
+        except EvaluationError:
+            return False
+        return True
+
+    def emit_helpers(self, emitter):
+        """
+        Emit the function writing the precomputed output. It is defined before
+        main so that the program's variables cannot shadow stdio names
+        """
+        if self.output:
+            emitter.header_line("static void {}(void)".format(OUTPUT_FUNCTION))
+            emitter.header_line("{")
+            emitter.header_line("static const char output[] =")
+            for line in self.output:
+                emitter.header_line("    {}".format(c_string(line)))
+            emitter.header_line(";")
+            emitter.header_line("fwrite(output, 1, sizeof(output) - 1, stdout);")
+            emitter.header_line("}")
+
+    def emit_entry(self, emitter):
+        """Emit the precomputed output and state at the start of main"""
+        if self.output:
+            emitter.emit_line("{}();".format(OUTPUT_FUNCTION))
+
+        if not self.finished:
+            for name, value in self.variables.items():
+                if name not in self.constants:
+                    emitter.emit_line("{} = {};".format(name, c_float(value)))
+            emitter.emit_line("goto {};".format(RESUME_LABEL))
+
+    def emit_program(self, emitter):
+        """Emit a main that only writes the output of a finished program"""
+        emitter.header_line("#include <stdio.h>")
+        self.emit_helpers(emitter)
+        emitter.header_line("int main(int argc, char *argv[])")
+        emitter.header_line("{")
+        self.emit_entry(emitter)
+        emitter.emit_line("return 0;")
+        emitter.emit_line("}")
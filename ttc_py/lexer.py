@@ -1,5 +1,5 @@
-import sys
 from enum import Enum
+from ttc_py.errors import *
 
 
 class TokenType(Enum):
@@ -40,9 +40,11 @@ class TokenType(Enum):
 
 
 class Token:
-    def __init__(self, spelling, kind):
+    def __init__(self, spelling, kind, line=None, column=None):
         self.spelling = spelling
         self.kind = kind
+        self.line = line
+        self.column = column
 
     def __eq__(self, other):
         return self.spelling == other.spelling and self.kind == other.kind
@@ -56,9 +58,17 @@ class Lexer:
         self.source = input + "\n"
         self.curpos = -1
         self.curchar = ""
+        self.line = 1
+        self.column = 0
+        self.tokens = []
         self.next_char()
 
     def next_char(self):
+        if self.curchar == "\n":
+            self.line += 1
+            self.column = 1
+        else:
+            self.column += 1
         self.curpos += 1
         if self.curpos >= len(self.source):
             self.curchar = "\0"
@@ -72,7 +82,7 @@ class Lexer:
             return self.source[self.curpos + 1]
 
     def abort(self, message):
-        sys.exit("Lexer error: {}".format(message))
+        raise LexerError(message, self.line, self.column)
 
     def skip_whitespace(self):
         while self.curchar == " " or self.curchar == "\t" or self.curchar == "\r":
@@ -86,6 +96,7 @@ class Lexer:
     def get_token(self):
         self.skip_whitespace()
         self.skip_comments()
+        line, column = self.line, self.column
         token = None
 
         if self.curchar == "+":
@@ -136,7 +147,7 @@ class Lexer:
 
             while self.curchar != '"':
                 if self.curchar in ["\r", "\n", "\t", "\\", "%"]:
-                    self.abort("Illegal character in string: {}".format(self.curchar()))
+                    self.abort("Illegal character in string: {}".format(self.curchar))
                 self.next_char()
             token = Token(self.source[startpos : self.curpos], TokenType.STRING)
         elif self.curchar.isdigit():
@@ -169,5 +180,24 @@ class Lexer:
         else:
             self.abort("Unknown token: {}".format(self.curchar))
 
+        token.line, token.column = line, column
         self.next_char()
-        return token
\ No newline at end of file
+        self.tokens.append(token)
+        return token
+
+    def replay(self):
+        """A token source over the tokens lexed so far, so that later passes need not lex again"""
+        return TokenStream(self.tokens)
+
+
+class TokenStream:
+    """Replays recorded tokens through the same `get_token` interface as the Lexer"""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def get_token(self):
+        token = self.tokens[min(self.pos, len(self.tokens) - 1)]
+        self.pos += 1
+        return token
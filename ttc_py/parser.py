@@ -1,17 +1,20 @@
-import sys
+from ttc_py.errors import *
 from ttc_py.lexer import *
 from ttc_py.emitter import *
+from ttc_py.evaluator import RESUME_LABEL, c_float
 
 
 class Parser:
-    def __init__(self, lexer, emitter):
+    def __init__(self, lexer, emitter, evaluator=None):
         self.lexer = lexer
         self.emitter = emitter
+        self.evaluator = evaluator
+        self.statement_count = 0
         self.curtoken = None
         self.peektoken = None
         self.symbols = set()
         self.declared_labels = set()
-        self.gotoed_labels = set()
+        self.gotoed_labels = {}
         self.next_token()  # peektoken is set
         self.next_token()  # curtoken is set
 
@@ -34,18 +37,26 @@ class Parser:
         self.curtoken = self.peektoken
         self.peektoken = self.lexer.get_token()
 
-    def abort(self, message):
-        """exit the parser with an error message"""
-        sys.exit("Parser error: {}".format(message))
+    def abort(self, message, token=None):
+        """raise a parser error at the given token, defaulting to the current one"""
+        if token is None:
+            token = self.curtoken
+        raise ParserError(message, token.line, token.column)
 
     ## production rules
 
     def program(self):
         """program ::= { statement }"""
         self.emitter.header_line("#include <stdio.h>")
+        if self.evaluator is not None:
+            self.evaluator.emit_helpers(self.emitter)
         self.emitter.header_line("int main(int argc, char *argv[])")
         self.emitter.header_line("{")
 
+        # specialize on the state reached by compile-time evaluation
+        if self.evaluator is not None:
+            self.evaluator.emit_entry(self.emitter)
+
         while self.check_token(TokenType.NEWLINE):
             self.match(TokenType.NEWLINE)
 
@@ -57,9 +68,11 @@ class Parser:
 
         # basic typechecking - ensure that all the labels that
         # have been GOTOed are valid labels
-        for label in self.gotoed_labels:
+        for label, token in self.gotoed_labels.items():
             if label not in self.declared_labels:
-                self.abort("Attempting to GOTO to an undeclared label {}".format(label))
+                self.abort(
+                    "Attempting to GOTO to an undeclared label {}".format(label), token
+                )
 
     def statement(self):
         """
@@ -71,6 +84,15 @@ class Parser:
                     | "LET" ident "=" expression NL
                     | "INPUT" ident NL
         """
+        # statements that cannot run after resuming are parsed but not emitted
+        dead = False
+        start = len(self.emitter.code)
+        if self.evaluator is not None:
+            dead = self.statement_count in self.evaluator.dead_statements
+            if self.evaluator.resume_statement == self.statement_count:
+                self.emitter.emit_line("{}:".format(RESUME_LABEL))
+        self.statement_count += 1
+
         if self.check_token(TokenType.PRINT):
             self.match(TokenType.PRINT)
 
@@ -120,15 +142,13 @@ class Parser:
             self.match(TokenType.IDENT)
         elif self.check_token(TokenType.GOTO):
             self.match(TokenType.GOTO)
-            self.gotoed_labels.add(self.curtoken.spelling)
+            self.gotoed_labels.setdefault(self.curtoken.spelling, self.curtoken)
             self.emitter.emit_line("goto {};".format(self.curtoken.spelling))
             self.match(TokenType.IDENT)
         elif self.check_token(TokenType.LET):
             self.match(TokenType.LET)
 
-            if self.curtoken.spelling not in self.symbols:
-                self.emitter.header_line("float {};".format(self.curtoken.spelling))
-                self.symbols.add(self.curtoken.spelling)
+            self.declare(self.curtoken.spelling)
 
             self.emitter.emit("{} = ".format(self.curtoken.spelling))
             self.match(TokenType.IDENT)
@@ -138,9 +158,7 @@ class Parser:
         elif self.check_token(TokenType.INPUT):
             self.match(TokenType.INPUT)
 
-            if self.curtoken.spelling not in self.symbols:
-                self.emitter.header_line(f"float {self.curtoken.spelling};")
-                self.symbols.add(self.curtoken.spelling)
+            self.declare(self.curtoken.spelling)
 
             self.emitter.emit_line(
                 'if(0 == scanf("%' + 'f", &' + self.curtoken.spelling + ")) {"
@@ -155,6 +173,22 @@ class Parser:
 
         self.nl()
 
+        if dead:
+            self.emitter.code = self.emitter.code[:start]
+
+    def declare(self, name):
+        """Declare a variable on its first assignment, unless it is folded away"""
+        if name not in self.symbols:
+            if self.constant(name) is None:
+                self.emitter.header_line("float {};".format(name))
+            self.symbols.add(name)
+
+    def constant(self, name):
+        """The value of a variable known to be constant after resuming, or None"""
+        if self.evaluator is None:
+            return None
+        return self.evaluator.constants.get(name)
+
     def comparison(self):
         """
         comparison ::= expression (("==" | "!=" | "<" | "<=" | ">" | ">=") expression)+
@@ -222,7 +256,11 @@ class Parser:
                         self.curtoken.spelling
                     )
                 )
-            self.emitter.emit(self.curtoken.spelling)
+            value = self.constant(self.curtoken.spelling)
+            if value is None:
+                self.emitter.emit(self.curtoken.spelling)
+            else:
+                self.emitter.emit(c_float(value))
             self.next_token()
         else:
             self.abort(